@@ -1,5 +1,6 @@
 # data_fetcher.py - Fetching data from APIs
 import requests
+from requests.adapters import HTTPAdapter, Retry
 import json
 from datetime import datetime
 
@@ -7,6 +8,15 @@ print("=" * 70)
 print("APIs - FETCHING DATA FROM THE INTERNET")
 print("=" * 70)
 
+# One Session for all the examples below: the pooled connection is
+# reused between requests to the same host, so only the first one pays
+# the TCP + TLS handshake. Retries with backoff cover transient errors
+session = requests.Session()
+adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10,
+                      max_retries=Retry(total=3, backoff_factor=0.3))
+session.mount("https://", adapter)
+session.mount("http://", adapter)
+
 # ===== EXAMPLE 1: Simple API Request =====
 print("\n1. MAKING A SIMPLE API REQUEST:")
 print("-" * 70)
@@ -17,7 +27,7 @@ url = "https://jsonplaceholder.typicode.com/users/1"
 print(f"Requesting data from: {url}")
 
 # Make the request
-response = requests.get(url)
+response = session.get(url, timeout=5)
 
 print(f"Status code: {response.status_code}")  # 200 means success
 print(f"Response type: {type(response.json())}")
@@ -40,7 +50,7 @@ print("\n3. FETCHING MULTIPLE RECORDS:")
 print("-" * 70)
 
 url = "https://jsonplaceholder.typicode.com/posts"
-response = requests.get(url)
+response = session.get(url, timeout=5)
 
 posts = response.json()
 print(f"Total posts received: {len(posts)}")
@@ -60,7 +70,7 @@ params = {
     'userId': 1
 }
 
-response = requests.get(url, params=params)
+response = session.get(url, params=params, timeout=5)
 user_posts = response.json()
 
 print(f"Posts by user 1: {len(user_posts)}")
@@ -76,7 +86,7 @@ url = f"https://wttr.in/{city}?format=j1"
 print(f"Getting weather for {city}...")
 
 try:
-    response = requests.get(url)
+    response = session.get(url, timeout=5)
     
     if response.status_code == 200:
         weather_data = response.json()
@@ -114,7 +124,7 @@ print("-" * 70)
 bad_url = "https://jsonplaceholder.typicode.com/invalid"
 
 try:
-    response = requests.get(bad_url, timeout=5)
+    response = session.get(bad_url, timeout=5)
     
     if response.status_code == 200:
         print("Success!")
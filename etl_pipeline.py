@@ -1,5 +1,6 @@
 # etl_pipeline.py - Complete ETL Pipeline with Transformation
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from weather_collector import WeatherCollector
 from data_transformer import WeatherDataTransformer
@@ -50,25 +51,22 @@ class WeatherETLPipeline:
             print(f"[TRANSFORM] ❌ Failed to parse data")
             return None, False, ["Parse error"]
         
-        # Step 2: Clean the data
-        record = self.transformer.clean_weather_record(record)
-        print(f"[TRANSFORM] ✓ Data cleaned")
-        
+        # Step 2: Clean and enrich in one fused pass (one dict copy
+        # instead of one per stage)
+        record = self.transformer.clean_and_derive(record)
+        print(f"[TRANSFORM] ✓ Data cleaned and derived fields calculated")
+
         # Step 3: Validate the data
         is_valid, issues = self.transformer.validate_weather_record(record)
-        
+
         if not is_valid:
             print(f"[TRANSFORM] ⚠️  Validation issues found:")
             for issue in issues:
                 print(f"            - {issue}")
         else:
             print(f"[TRANSFORM] ✓ Data validated")
-        
-        # Step 4: Calculate derived fields
-        record = self.transformer.calculate_derived_fields(record)
-        print(f"[TRANSFORM] ✓ Derived fields calculated")
-        
-        # Step 5: Check for duplicates
+
+        # Step 4: Check for duplicates
         is_dup, dup_id = self.transformer.check_for_duplicate(record)
         if is_dup:
             print(f"[TRANSFORM] ⚠️  Duplicate detected (ID: {dup_id})")
@@ -150,29 +148,125 @@ class WeatherETLPipeline:
         Run ETL for multiple locations
         locations: list of dicts with 'city' and 'country' keys
         delay: seconds to wait between requests
+
+        Extracts and transforms the whole batch first, then resolves
+        duplicates for all of it with one query, then loads - the
+        database sees two round-trips for the duplicate stage instead
+        of one per location
         """
         print("\n" + "=" * 70)
         print("BATCH ETL PIPELINE")
         print(f"Processing {len(locations)} locations")
         print("=" * 70)
-        
+
+        fetched = []
+
         for i, loc in enumerate(locations, 1):
             print(f"\n[BATCH] Processing {i}/{len(locations)}")
-            
-            self.run_etl(
+            self.stats['attempted'] += 1
+
+            # EXTRACT
+            data = self.extract_weather_data(
                 loc['city'],
                 loc.get('country'),
                 loc.get('lat'),
                 loc.get('lon')
             )
-            
+            fetched.append((loc, data))
+
             # Wait between requests (be nice to the API)
             if i < len(locations):
                 print(f"\n[BATCH] Waiting {delay} seconds...")
                 time.sleep(delay)
-        
+
+        self._transform_and_load_batch(fetched)
+
+        # Print summary
+        self.print_summary()
+
+    def run_batch_etl_parallel(self, locations, concurrency=4):
+        """
+        Like run_batch_etl, but fetches concurrently - the extract
+        stage is pure network wait, so a small worker pool makes the
+        wall-clock for L locations the slowest fetch instead of the
+        sum of them, while the pool size keeps the burst polite to
+        the API
+        """
+        print("\n" + "=" * 70)
+        print("BATCH ETL PIPELINE (PARALLEL)")
+        print(f"Processing {len(locations)} locations "
+              f"with {concurrency} workers")
+        print("=" * 70)
+
+        self.stats['attempted'] += len(locations)
+
+        def fetch_one(loc):
+            return loc, self.extract_weather_data(
+                loc['city'],
+                loc.get('country'),
+                loc.get('lat'),
+                loc.get('lon')
+            )
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            fetched = list(executor.map(fetch_one, locations))
+
+        self._transform_and_load_batch(fetched)
+
         # Print summary
         self.print_summary()
+
+    def _transform_and_load_batch(self, fetched):
+        """
+        Shared transform + load tail of the batch pipelines:
+        fetched is a list of (location, raw data or None) pairs
+        """
+        prepared = []
+
+        for loc, data in fetched:
+            if not data:
+                self.stats['failed'] += 1
+                continue
+
+            # TRANSFORM (everything except the duplicate check,
+            # which runs once for the whole batch below)
+            record = self.collector.parse_weather_data(
+                data, loc['city'], loc.get('country'))
+
+            if not record:
+                self.stats['failed'] += 1
+                continue
+
+            record = self.transformer.clean_and_derive(record)
+            is_valid, issues = self.transformer.validate_weather_record(record)
+            if not is_valid:
+                self.stats['validation_errors'] += 1
+            prepared.append((record, is_valid, issues))
+
+        # One query answers the duplicate check for the whole batch
+        dup_results = self.transformer.check_duplicates_bulk(
+            [record for record, _, _ in prepared])
+
+        # LOAD - collect everything that passed, then save it all in one
+        # transaction so the batch pays a single commit/fsync
+        to_load = []
+
+        for (record, is_valid, issues), (is_dup, dup_id) in zip(prepared, dup_results):
+            if is_dup:
+                print(f"[BATCH] ⚠️  Duplicate detected (ID: {dup_id}) - skipping")
+                self.stats['duplicates'] += 1
+                continue
+
+            if not is_valid:
+                print(f"[BATCH] ❌ Skipping invalid data for "
+                      f"{record.get('city')}")
+                continue
+
+            to_load.append(record)
+
+        if to_load:
+            print(f"[LOAD] Saving batch of {len(to_load)} records...")
+            self.stats['succeeded'] += self.collector.save_weather_batch(to_load)
     
     def print_summary(self):
         """Print pipeline execution summary"""
@@ -193,7 +287,9 @@ class WeatherETLPipeline:
     
     def generate_data_quality_report(self):
         """Generate and display data quality report"""
-        print(self.transformer.get_data_quality_report())
+        # SQL-aggregate version: the database computes the metrics, so
+        # the whole table is never pulled into Python
+        print(self.transformer.get_data_quality_report_sql())
     
     def show_statistics(self):
         """Show summary statistics"""
@@ -2,6 +2,13 @@
 import requests
 import json
 
+# Optional: genson infers a full JSON Schema in one walk, which is both
+# faster and more complete than the hand-rolled two-level key dump below
+try:
+    import genson
+except ImportError:
+    genson = None
+
 def explore_api(url):
     """Explore an API's response structure"""
     print("=" * 70)
@@ -16,44 +23,58 @@ def explore_api(url):
             print(f"Error: Status {response.status_code}")
             return
         
-        data = response.json()
-        
+        # Keep the raw bytes: the preview and the saved file both come
+        # straight from the body, so the payload is parsed exactly once
+        # and never re-serialized with indentation
+        raw = response.content
+        data = json.loads(raw)
+
         # Show full response (first 2000 chars)
         print("\n1. RAW RESPONSE (preview):")
         print("-" * 70)
-        json_str = json.dumps(data, indent=2)
-        print(json_str[:2000])
-        if len(json_str) > 2000:
+        print(response.text[:2000])
+        if len(raw) > 2000:
             print("\n... (truncated)")
         
         # Show structure
         print("\n2. STRUCTURE ANALYSIS:")
         print("-" * 70)
-        print(f"Type: {type(data)}")
-        
-        if isinstance(data, dict):
-            print(f"Keys: {list(data.keys())}")
-            print("\nExploring each key:")
-            for key in list(data.keys())[:5]:  # First 5 keys
-                print(f"\n  {key}:")
-                print(f"    Type: {type(data[key])}")
-                if isinstance(data[key], list) and len(data[key]) > 0:
-                    print(f"    Length: {len(data[key])}")
-                    print(f"    First item type: {type(data[key][0])}")
-                elif isinstance(data[key], dict):
-                    print(f"    Keys: {list(data[key].keys())[:5]}")
-        
-        elif isinstance(data, list):
-            print(f"List length: {len(data)}")
-            if len(data) > 0:
-                print(f"First item type: {type(data[0])}")
-                if isinstance(data[0], dict):
-                    print(f"First item keys: {list(data[0].keys())}")
-        
-        # Save to file
+
+        if genson is not None:
+            # One pass over the payload produces a complete JSON Schema
+            # instead of the two-level manual key dump
+            builder = genson.SchemaBuilder()
+            builder.add_object(data)
+            print(json.dumps(builder.to_schema(), indent=2))
+
+        else:
+            # Fallback: the original hand-rolled two-level walk
+            print(f"Type: {type(data)}")
+
+            if isinstance(data, dict):
+                print(f"Keys: {list(data.keys())}")
+                print("\nExploring each key:")
+                for key in list(data.keys())[:5]:  # First 5 keys
+                    print(f"\n  {key}:")
+                    print(f"    Type: {type(data[key])}")
+                    if isinstance(data[key], list) and len(data[key]) > 0:
+                        print(f"    Length: {len(data[key])}")
+                        print(f"    First item type: {type(data[key][0])}")
+                    elif isinstance(data[key], dict):
+                        print(f"    Keys: {list(data[key].keys())[:5]}")
+
+            elif isinstance(data, list):
+                print(f"List length: {len(data)}")
+                if len(data) > 0:
+                    print(f"First item type: {type(data[0])}")
+                    if isinstance(data[0], dict):
+                        print(f"First item keys: {list(data[0].keys())}")
+
+
+        # Save to file - the bytes as received, no re-serialization
         filename = 'api_response_sample.json'
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
+        with open(filename, 'wb') as f:
+            f.write(raw)
         print(f"\n3. Full response saved to: {filename}")
         
         return data
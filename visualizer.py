@@ -3,9 +3,19 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
+import numpy as np
+import os
 import sqlite3
 from datetime import datetime
 
+# Optional: connectorx copies query results straight into pandas
+# columns, skipping the per-row Python objects that dominate
+# read_sql_query's cost on numeric columns
+try:
+    import connectorx
+except ImportError:
+    connectorx = None
+
 class WeatherVisualizer:
     """
     Creates visualizations for weather data analysis
@@ -14,26 +24,111 @@ class WeatherVisualizer:
     def __init__(self, db_name='weather.db'):
         self.db_name = db_name
         self.df = self.load_data()
-    
+        # Latest reading per location, computed once and shared by the
+        # "current conditions" plots - resolved by an indexed SQL
+        # lookup instead of sorting the whole history in pandas
+        self.latest = self.load_latest_per_city()
+        # Figures built so far, by name - repeat viewings reuse the
+        # object, and update_all() patches its traces in place instead
+        # of rebuilding identical axes and layout
+        self._figs = {}
+        # When create_all_visualizations is running, figures collect
+        # here for one combined page instead of opening a tab each
+        self._page = None
+
     def load_data(self):
         """Load weather data into pandas DataFrame"""
-        conn = sqlite3.connect(self.db_name)
-        
         query = "SELECT * FROM weather_data ORDER BY timestamp"
+
+        if connectorx is not None:
+            df = connectorx.read_sql(
+                f"sqlite://{os.path.abspath(self.db_name)}",
+                query,
+                return_type='pandas'
+            )
+        else:
+            conn = sqlite3.connect(self.db_name)
+            df = pd.read_sql_query(query, conn)
+            conn.close()
+
+        if not df.empty:
+            # Convert to datetime - the explicit format takes pandas'
+            # fast C parser instead of inferring the format per string,
+            # and date falls out of timestamp for free instead of
+            # parsing a second column
+            df['timestamp'] = pd.to_datetime(df['timestamp'],
+                                             format='%Y-%m-%d %H:%M:%S',
+                                             cache=True)
+            df['date'] = df['timestamp'].dt.normalize()
+            # Hour-of-day, computed once here rather than through the
+            # .dt accessor on every heatmap render
+            df['hour'] = df['timestamp'].dt.hour.astype('int8')
+
+            # Shrink dtypes: the defaults are object strings and 64-bit
+            # numbers, but the real ranges fit in category codes,
+            # int16/int8 and float32 - about a quarter of the memory,
+            # and groupbys/sorts compare short keys instead of strings
+            for col in ('city', 'country', 'condition'):
+                df[col] = df[col].astype('category')
+            df['humidity'] = df['humidity'].astype('int16')
+            df['uv_index'] = df['uv_index'].astype('int8')
+            for col in ('temp_c', 'feels_like_c', 'wind_speed_kmph',
+                        'pressure_mb', 'visibility_km'):
+                df[col] = df[col].astype('float32')
+
+            # Create city-country label for clearer display
+            df['location'] = (df['city'].astype(str) + ', ' +
+                              df['country'].astype(str)).astype('category')
+
+        return df
+
+    def load_latest_per_city(self):
+        """
+        Latest reading per city, resolved by SQLite - the indexed MAX
+        lookup returns ~|cities| rows instead of shipping the whole
+        history to pandas and sorting it there
+        """
+        conn = sqlite3.connect(self.db_name)
+
+        # Same index the transformer creates; make sure it exists so
+        # the correlated MAX is a per-city seek, not a scan
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_weather_city_ts
+            ON weather_data(city, country, timestamp DESC)
+        """)
+
+        query = """
+            SELECT * FROM weather_data w
+            WHERE timestamp = (
+                SELECT MAX(timestamp) FROM weather_data
+                WHERE city = w.city AND country = w.country
+            )
+        """
         df = pd.read_sql_query(query, conn)
-        
+
         conn.close()
-        
+
         if not df.empty:
-            # Convert to datetime
-            df['date'] = pd.to_datetime(df['date'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            # Create city-country label for clearer display
+            # Same single explicit-format parse as load_data
+            df['timestamp'] = pd.to_datetime(df['timestamp'],
+                                             format='%Y-%m-%d %H:%M:%S',
+                                             cache=True)
+            df['date'] = df['timestamp'].dt.normalize()
             df['location'] = df['city'] + ', ' + df['country']
-        
+
         return df
-    
+
+    def _display(self, fig):
+        """
+        Show a figure - directly when a plot method is called on its
+        own, or stashed for the combined dashboard page when called
+        from create_all_visualizations
+        """
+        if self._page is not None:
+            self._page.append(fig)
+        else:
+            fig.show()
+
     def plot_temperature_by_city(self):
         """
         Bar chart: Current temperature by city
@@ -41,36 +136,41 @@ class WeatherVisualizer:
         if self.df.empty:
             print("No data available for visualization")
             return
-        
-        # Get the latest reading for each city
-        latest = self.df.sort_values('timestamp').groupby('location').last().reset_index()
-        
-        # Sort by temperature
-        latest = latest.sort_values('temp_c', ascending=True)
-        
-        # Create bar chart
-        fig = px.bar(
-            latest,
-            x='temp_c',
-            y='location',
-            orientation='h',
-            title='Current Temperature by City',
-            labels={'temp_c': 'Temperature (°C)', 'location': 'City'},
-            color='temp_c',
-            color_continuous_scale='RdYlBu_r',  # Red (hot) to Blue (cold)
-            text='temp_c'
-        )
-        
-        # Customize layout
-        fig.update_traces(texttemplate='%{text:.1f}°C', textposition='outside')
-        fig.update_layout(
-            height=500,
-            showlegend=False,
-            xaxis_title="Temperature (°C)",
-            yaxis_title="",
-        )
-        
-        fig.show()
+
+        # Reuse the figure built on the first call - the data doesn't
+        # change within a session, and update_all() patches the arrays
+        # in place when it does
+        fig = self._figs.get('temp_by_city')
+
+        if fig is None:
+            # Get the latest reading for each city, sorted by temperature
+            latest = self.latest.sort_values('temp_c', ascending=True)
+
+            # Create bar chart
+            fig = px.bar(
+                latest,
+                x='temp_c',
+                y='location',
+                orientation='h',
+                title='Current Temperature by City',
+                labels={'temp_c': 'Temperature (°C)', 'location': 'City'},
+                color='temp_c',
+                color_continuous_scale='RdYlBu_r',  # Red (hot) to Blue (cold)
+                text='temp_c'
+            )
+
+            # Customize layout
+            fig.update_traces(texttemplate='%{text:.1f}°C', textposition='outside')
+            fig.update_layout(
+                height=500,
+                showlegend=False,
+                xaxis_title="Temperature (°C)",
+                yaxis_title="",
+            )
+
+            self._figs['temp_by_city'] = fig
+
+        self._display(fig)
         print("✓ Temperature comparison chart created")
     
     def plot_temperature_trends(self):
@@ -81,21 +181,22 @@ class WeatherVisualizer:
             print("No data available for visualization")
             return
         
-        fig = px.line(
-            self.df,
-            x='timestamp',
-            y='temp_c',
-            color='location',
-            title='Temperature Trends Over Time',
-            labels={
-                'temp_c': 'Temperature (°C)',
-                'timestamp': 'Date & Time',
-                'location': 'City'
-            },
-            markers=True
-        )
-        
+        # WebGL-backed traces: SVG scatter slows down badly past a few
+        # thousand points, Scattergl keeps pan/zoom smooth
+        fig = go.Figure()
+
+        for loc, group in self.df.groupby('location', observed=True):
+            fig.add_trace(go.Scattergl(
+                x=group['timestamp'],
+                y=group['temp_c'],
+                mode='lines+markers',
+                name=loc
+            ))
+
         fig.update_layout(
+            title='Temperature Trends Over Time',
+            xaxis_title='Date & Time',
+            yaxis_title='Temperature (°C)',
             height=500,
             hovermode='x unified',
             legend=dict(
@@ -107,7 +208,7 @@ class WeatherVisualizer:
             )
         )
         
-        fig.show()
+        self._display(fig)
         print("✓ Temperature trends chart created")
     
     def plot_humidity_vs_temperature(self):
@@ -118,24 +219,31 @@ class WeatherVisualizer:
             print("No data available for visualization")
             return
         
-        fig = px.scatter(
-            self.df,
-            x='temp_c',
-            y='humidity',
-            color='location',
-            size='wind_speed_kmph',
-            hover_data=['condition', 'feels_like_c'],
+        # WebGL-backed traces, same reason as plot_temperature_trends
+        fig = go.Figure()
+
+        for loc, group in self.df.groupby('location', observed=True):
+            fig.add_trace(go.Scattergl(
+                x=group['temp_c'],
+                y=group['humidity'],
+                mode='markers',
+                name=loc,
+                marker=dict(size=group['wind_speed_kmph']),
+                customdata=group[['condition', 'feels_like_c']],
+                hovertemplate=(
+                    'Temp: %{x}°C<br>Humidity: %{y}%<br>'
+                    'Condition: %{customdata[0]}<br>'
+                    'Feels like: %{customdata[1]}°C'
+                )
+            ))
+
+        fig.update_layout(
             title='Humidity vs Temperature (bubble size = wind speed)',
-            labels={
-                'temp_c': 'Temperature (°C)',
-                'humidity': 'Humidity (%)',
-                'location': 'City',
-                'wind_speed_kmph': 'Wind Speed (km/h)'
-            }
+            xaxis_title='Temperature (°C)',
+            yaxis_title='Humidity (%)',
+            height=500
         )
-        
-        fig.update_layout(height=500)
-        fig.show()
+        self._display(fig)
         print("✓ Humidity vs Temperature scatter plot created")
     
     def plot_weather_conditions_distribution(self):
@@ -159,7 +267,7 @@ class WeatherVisualizer:
         fig.update_traces(textposition='inside', textinfo='percent+label')
         fig.update_layout(height=500)
         
-        fig.show()
+        self._display(fig)
         print("✓ Weather conditions distribution chart created")
     
     def plot_comfort_analysis(self):
@@ -171,8 +279,7 @@ class WeatherVisualizer:
             return
         
         # Get latest data for each city
-        latest = self.df.sort_values('timestamp').groupby('location').last().reset_index()
-        latest = latest.sort_values('temp_c', ascending=False)
+        latest = self.latest.sort_values('temp_c', ascending=False)
         
         # Create subplots
         fig = make_subplots(
@@ -267,7 +374,7 @@ class WeatherVisualizer:
             showlegend=False
         )
         
-        fig.show()
+        self._display(fig)
         print("✓ Multi-panel comfort analysis dashboard created")
     
     def plot_city_comparison_radar(self):
@@ -278,35 +385,33 @@ class WeatherVisualizer:
             print("No data available for visualization")
             return
         
-        # Get latest data for each city
-        latest = self.df.sort_values('timestamp').groupby('location').last().reset_index()
-        
-        # Normalize values to 0-100 scale for fair comparison
-        latest['temp_normalized'] = ((latest['temp_c'] - latest['temp_c'].min()) /
-                                     (latest['temp_c'].max() - latest['temp_c'].min())) * 100
-        latest['humidity_normalized'] = latest['humidity']  # Already 0-100
-        latest['wind_normalized'] = ((latest['wind_speed_kmph'] - latest['wind_speed_kmph'].min()) /
-                                     (latest['wind_speed_kmph'].max() - latest['wind_speed_kmph'].min())) * 100
-        latest['pressure_normalized'] = ((latest['pressure_mb'] - latest['pressure_mb'].min()) /
-                                        (latest['pressure_mb'].max() - latest['pressure_mb'].min())) * 100
-        
+        latest = self.latest
+
+        # Normalize to a 0-100 scale with one matrix min-max: a single
+        # pair of column-wise reductions replaces eight separate
+        # Series.min/max scans (humidity is already 0-100 and passes
+        # through unchanged)
+        M = latest[['temp_c', 'humidity', 'wind_speed_kmph',
+                    'pressure_mb']].to_numpy(dtype=np.float32)
+        mn = M.min(0, keepdims=True)
+        mx = M.max(0, keepdims=True)
+        norm = (M - mn) / np.where(mx - mn == 0, 1, mx - mn) * 100
+        norm[:, 1] = M[:, 1]  # Already 0-100
+
         # Create radar chart
         fig = go.Figure()
-        
+
         categories = ['Temperature', 'Humidity', 'Wind Speed', 'Pressure']
-        
+
         # Add a trace for each city (limit to first 5 for readability)
-        for idx, row in latest.head(5).iterrows():
+        locs = latest['location'].to_numpy()
+
+        for i in range(min(5, len(locs))):
             fig.add_trace(go.Scatterpolar(
-                r=[
-                    row['temp_normalized'],
-                    row['humidity_normalized'],
-                    row['wind_normalized'],
-                    row['pressure_normalized']
-                ],
+                r=norm[i].tolist(),
                 theta=categories,
                 fill='toself',
-                name=row['location']
+                name=locs[i]
             ))
         
         fig.update_layout(
@@ -321,7 +426,7 @@ class WeatherVisualizer:
             height=600
         )
         
-        fig.show()
+        self._display(fig)
         print("✓ Radar comparison chart created")
     
     def generate_summary_statistics(self):
@@ -336,16 +441,19 @@ class WeatherVisualizer:
         print("WEATHER DATA SUMMARY STATISTICS")
         print("=" * 70)
         
-        summary = self.df.groupby('location').agg({
-            'temp_c': ['mean', 'min', 'max', 'std'],
-            'humidity': 'mean',
-            'wind_speed_kmph': 'mean',
-            'pressure_mb': 'mean',
-            'id': 'count'
-        }).round(2)
-        
-        summary.columns = ['Avg Temp', 'Min Temp', 'Max Temp', 'Temp Std',
-                          'Avg Humidity', 'Avg Wind', 'Avg Pressure', 'Records']
+        # Named aggregations in one pass - the grouper runs over the
+        # categorical's integer codes, and every reduction here is a
+        # builtin that pandas dispatches to its compiled fast path
+        summary = self.df.groupby('location', observed=True).agg(
+            **{'Avg Temp': ('temp_c', 'mean'),
+               'Min Temp': ('temp_c', 'min'),
+               'Max Temp': ('temp_c', 'max'),
+               'Temp Std': ('temp_c', 'std'),
+               'Avg Humidity': ('humidity', 'mean'),
+               'Avg Wind': ('wind_speed_kmph', 'mean'),
+               'Avg Pressure': ('pressure_mb', 'mean'),
+               'Records': ('id', 'count')}
+        ).round(2)
         
         print(summary)
         print("=" * 70)
@@ -358,16 +466,32 @@ class WeatherVisualizer:
             print("No data available")
             return
         
-        # Pivot data for heatmap
-        df_pivot = self.df.pivot_table(
-            values='temp_c',
-            index='location',
-            columns=self.df['timestamp'].dt.hour,
-            aggfunc='mean'
-        )
-        
+        # Mean temperature by (location, hour) with two bincounts over
+        # flattened category codes - one sum and one count in C replace
+        # pivot_table's hash grouper and its intermediate frames
+        # Widen the codes before the arithmetic - they come back as
+        # int8, which `* 24` would wrap past a handful of cities
+        loc_codes = self.df['location'].cat.codes.to_numpy(np.int64)
+        locations = list(self.df['location'].cat.categories)
+        hour_codes = self.df['hour'].to_numpy().astype(np.int32)
+        n_loc = len(locations)
+
+        flat = loc_codes * 24 + hour_codes
+        sums = np.bincount(flat, weights=self.df['temp_c'].to_numpy(),
+                           minlength=n_loc * 24)
+        counts = np.bincount(flat, minlength=n_loc * 24).reshape(n_loc, 24)
+        pivot = np.where(counts > 0,
+                         sums.reshape(n_loc, 24) / np.maximum(counts, 1),
+                         np.nan)
+
+        # Keep only hours with data, like pivot_table's columns did
+        observed = counts.sum(axis=0) > 0
+        hours = np.arange(24)[observed]
+
         fig = px.imshow(
-            df_pivot,
+            pivot[:, observed],
+            x=hours,
+            y=locations,
             labels=dict(x="Hour of Day", y="City", color="Temperature (°C)"),
             title="Temperature Heatmap by City and Hour",
             color_continuous_scale='RdYlBu_r',
@@ -377,7 +501,7 @@ class WeatherVisualizer:
         fig.update_xaxes(side="bottom")
         fig.update_layout(height=500)
         
-        fig.show()
+        self._display(fig)
         print("✓ Temperature heatmap created")
     
     def plot_wind_rose(self):
@@ -398,7 +522,10 @@ class WeatherVisualizer:
                 'wind_speed_kmph': 'Wind Speed (km/h)',
                 'location': 'City'
             },
-            points='all'  # Show all data points
+            # Overlaying every point is useful while the dataset is
+            # small, but past a few thousand readings the SVG markers
+            # dominate render time - fall back to outliers only
+            points='all' if len(self.df) <= 5000 else 'outliers'
         )
         
         fig.update_layout(
@@ -407,9 +534,35 @@ class WeatherVisualizer:
             xaxis_tickangle=45
         )
         
-        fig.show()
+        self._display(fig)
         print("✓ Wind speed box plot created")
     
+    def _latest_with_comfort(self):
+        """
+        Latest reading per city with the comfort score column added,
+        sorted by score - shared by plot_comfort_score and update_all
+        """
+        # Copy: this adds the comfort_score column
+        latest = self.latest.copy()
+
+        # Calculate comfort score (0-100) as whole-column arithmetic -
+        # no Python function call per row
+        # Ideal: 20-25°C, 40-60% humidity, low wind
+        temp_score = 100 - (latest['temp_c'] - 22.5).abs() * 4
+        humidity_score = 100 - (latest['humidity'] - 50).abs() * 2
+        wind_penalty = np.minimum(latest['wind_speed_kmph'] * 2, 50)
+
+        score = temp_score * 0.5 + humidity_score * 0.3 - wind_penalty * 0.2
+        latest['comfort_score'] = np.clip(score, 0, 100)  # Clamp between 0-100
+        return latest.sort_values('comfort_score', ascending=True)
+
+    def _comfort_colors(self, scores):
+        """Map comfort scores to the red/orange/yellow/green scale"""
+        # One C-level binning pass instead of a Python ternary per row
+        bins = np.array([40, 60, 80])
+        labels = np.array(['red', 'orange', 'yellow', 'green'])
+        return labels[np.digitize(np.asarray(scores), bins)].tolist()
+
     def plot_comfort_score(self):
         """
         Calculate and visualize comfort score
@@ -418,54 +571,85 @@ class WeatherVisualizer:
         if self.df.empty:
             print("No data available")
             return
-        
-        # Calculate comfort score (0-100)
-        # Ideal: 20-25°C, 40-60% humidity, low wind
-        def calculate_comfort(row):
-            temp_score = 100 - abs(row['temp_c'] - 22.5) * 4
-            humidity_score = 100 - abs(row['humidity'] - 50) * 2
-            wind_penalty = min(row['wind_speed_kmph'] * 2, 50)
-            
-            score = (temp_score * 0.5 + humidity_score * 0.3 - wind_penalty * 0.2)
-            return max(0, min(100, score))  # Clamp between 0-100
-        
-        latest = self.df.sort_values('timestamp').groupby('location').last().reset_index()
-        latest['comfort_score'] = latest.apply(calculate_comfort, axis=1)
-        latest = latest.sort_values('comfort_score', ascending=True)
-        
-        # Create color scale
-        colors = ['red' if x < 40 else 'orange' if x < 60 else 'yellow' if x < 80 else 'green'
-                 for x in latest['comfort_score']]
-        
-        fig = go.Figure(go.Bar(
-            x=latest['comfort_score'],
-            y=latest['location'],
-            orientation='h',
-            marker=dict(color=colors),
-            text=latest['comfort_score'].round(1),
-            textposition='outside'
-        ))
-        
-        fig.update_layout(
-            title='Weather Comfort Score by City (0-100)',
-            xaxis_title='Comfort Score',
-            yaxis_title='',
-            height=500,
-            showlegend=False
-        )
-        
-        fig.show()
+
+        # Reuse the figure built on the first call (see
+        # plot_temperature_by_city)
+        fig = self._figs.get('comfort_score')
+
+        if fig is None:
+            latest = self._latest_with_comfort()
+
+            fig = go.Figure(go.Bar(
+                x=latest['comfort_score'],
+                y=latest['location'],
+                orientation='h',
+                marker=dict(color=self._comfort_colors(latest['comfort_score'])),
+                text=latest['comfort_score'].round(1),
+                textposition='outside'
+            ))
+
+            fig.update_layout(
+                title='Weather Comfort Score by City (0-100)',
+                xaxis_title='Comfort Score',
+                yaxis_title='',
+                height=500,
+                showlegend=False
+            )
+
+            self._figs['comfort_score'] = fig
+
+        self._display(fig)
         print("✓ Comfort score visualization created")
 
-    
+    def update_all(self):
+        """
+        Reload the data and patch the cached figures' traces in place
+        instead of rebuilding them - axes, layout and color scales are
+        kept, only the data arrays change. Figures without an in-place
+        path are dropped so their plot method rebuilds them fresh.
+        """
+        self.df = self.load_data()
+
+        if self.df.empty:
+            self.latest = self.df
+            self._figs = {}
+            return
+
+        self.latest = self.load_latest_per_city()
+
+        fig = self._figs.get('temp_by_city')
+        if fig is not None:
+            latest = self.latest.sort_values('temp_c', ascending=True)
+            fig.data[0].x = latest['temp_c'].to_numpy()
+            fig.data[0].y = latest['location'].to_numpy()
+            fig.data[0].text = latest['temp_c'].to_numpy()
+            fig.data[0].marker.color = latest['temp_c'].to_numpy()
+
+        fig = self._figs.get('comfort_score')
+        if fig is not None:
+            latest = self._latest_with_comfort()
+            fig.data[0].x = latest['comfort_score'].to_numpy()
+            fig.data[0].y = latest['location'].to_numpy()
+            fig.data[0].text = latest['comfort_score'].round(1).to_numpy()
+            fig.data[0].marker.color = self._comfort_colors(latest['comfort_score'])
+
+        # Everything else rebuilds on its next plot call
+        for name in list(self._figs):
+            if name not in ('temp_by_city', 'comfort_score'):
+                del self._figs[name]
+
     def create_all_visualizations(self):
         """
-        Generate all visualizations in sequence
+        Generate all visualizations into one dashboard page
         """
         print("\n" + "=" * 70)
         print("GENERATING ALL VISUALIZATIONS")
         print("=" * 70)
-        
+
+        # Collect the figures instead of opening a tab (and shipping a
+        # full Plotly bundle) per chart - one page, one bundle
+        self._page = []
+
         print("\n1. Creating temperature comparison chart...")
         self.plot_temperature_by_city()
         
@@ -495,7 +679,25 @@ class WeatherVisualizer:
         
         print("\n10. Creating comfort score analysis...")
         self.plot_comfort_score()
-        
+
+        # Write everything to one HTML file: the first chart embeds
+        # the Plotly runtime (from the CDN), the rest reuse it
+        figs, self._page = self._page, None
+        filename = 'dashboard.html'
+
+        with open(filename, 'w') as f:
+            f.write('<html><body>\n')
+            for i, fig in enumerate(figs):
+                f.write(fig.to_html(
+                    full_html=False,
+                    include_plotlyjs='cdn' if i == 0 else False
+                ))
+            f.write('</body></html>\n')
+
+        import webbrowser
+        webbrowser.open('file://' + os.path.abspath(filename))
+        print(f"\n✓ Dashboard written to {filename} and opened in browser")
+
         print("\n" + "=" * 70)
         print("ALL VISUALIZATIONS COMPLETE!")
         print("=" * 70)
@@ -1,49 +1,197 @@
 # weather_collector.py - Collecting and storing weather data
+import copy
 import requests
 import sqlite3
+
+# Optional: orjson decodes JSON several times faster than the stdlib
+# parser, which is the collector's remaining CPU cost once fetches
+# overlap on the thread pool
+try:
+    import orjson
+except ImportError:
+    orjson = None
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import quote
 import time
 
+def init_weather_schema(db_name='weather.db'):
+    """
+    Create the weather tables if needed and sync the latest-per-city
+    snapshot. Shared by the collector and the dashboard so both can run
+    against a database created by an older version.
+    """
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS weather_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            city TEXT NOT NULL,
+            country TEXT NOT NULL,
+            latitude REAL,
+            longitude REAL,
+            date TEXT NOT NULL,
+            temp_c REAL CHECK(temp_c BETWEEN -90 AND 60),
+            feels_like_c REAL,
+            condition TEXT,
+            humidity INTEGER CHECK(humidity BETWEEN 0 AND 100),
+            wind_speed_kmph REAL CHECK(wind_speed_kmph BETWEEN 0 AND 500),
+            pressure_mb REAL,
+            visibility_km REAL,
+            uv_index INTEGER,
+            timestamp TEXT NOT NULL,
+            UNIQUE(city, country, date, timestamp)
+        )
+    ''')
+    # The CHECKs above mirror the transformer's validate_* ranges so a
+    # fresh database rejects out-of-range rows even when data is written
+    # without going through the ETL. SQLite can't retrofit CHECKs onto an
+    # existing table without a full rebuild, so databases created before
+    # this keep relying on the Python validation alone
+
+    # Materialized "current weather" snapshot: exactly one row per city,
+    # kept up to date by save_weather_data() so the dashboard never has
+    # to scan the full history for the latest reading
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS weather_latest (
+            city TEXT NOT NULL,
+            country TEXT NOT NULL,
+            latitude REAL,
+            longitude REAL,
+            date TEXT NOT NULL,
+            temp_c REAL,
+            feels_like_c REAL,
+            condition TEXT,
+            humidity INTEGER,
+            wind_speed_kmph REAL,
+            pressure_mb REAL,
+            visibility_km REAL,
+            uv_index INTEGER,
+            timestamp TEXT NOT NULL,
+            PRIMARY KEY (city, country)
+        )
+    ''')
+
+    # Materialized per-city aggregates for the stats page, refreshed on
+    # every insert. avg_temp_sq carries E[x^2] so the dashboard can
+    # derive the standard deviation (SQLite has no stddev aggregate)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS city_stats (
+            city TEXT NOT NULL,
+            country TEXT NOT NULL,
+            avg_temp REAL,
+            min_temp REAL,
+            max_temp REAL,
+            avg_temp_sq REAL,
+            avg_humidity REAL,
+            avg_wind REAL,
+            records INTEGER,
+            PRIMARY KEY (city, country)
+        )
+    ''')
+
+    # Read-side indexes: timestamp ordering for the history listing and
+    # the same (city, country, timestamp) index the transformer uses,
+    # which also covers DISTINCT city, country as a prefix scan
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_weather_ts
+        ON weather_data(timestamp DESC)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_weather_city_ts
+        ON weather_data(city, country, timestamp DESC)
+    ''')
+
+    # Re-sync the snapshot from history in case rows were written by an
+    # older version that didn't maintain weather_latest
+    cursor.execute('''
+        INSERT OR REPLACE INTO weather_latest
+        SELECT city, country, latitude, longitude, date, temp_c,
+               feels_like_c, condition, humidity, wind_speed_kmph,
+               pressure_mb, visibility_km, uv_index, timestamp
+        FROM (
+            SELECT *, ROW_NUMBER() OVER (
+                PARTITION BY city, country ORDER BY timestamp DESC
+            ) AS rn
+            FROM weather_data
+        )
+        WHERE rn = 1
+    ''')
+
+    # Same for the aggregates
+    cursor.execute('''
+        INSERT OR REPLACE INTO city_stats
+        SELECT city, country, AVG(temp_c), MIN(temp_c), MAX(temp_c),
+               AVG(temp_c * temp_c), AVG(humidity), AVG(wind_speed_kmph),
+               COUNT(*)
+        FROM weather_data
+        GROUP BY city, country
+    ''')
+
+    conn.commit()
+    conn.close()
+
+
 class WeatherCollector:
     """
     Collects weather data from API and stores in database
     IMPROVED VERSION: Handles location ambiguity properly
     """
-    
-    def __init__(self, db_name='weather.db'):
+
+    def __init__(self, db_name='weather.db', cache_ttl=600):
         self.db_name = db_name
         self.base_url = "https://wttr.in"
+        self._conn = None
+        # Recently fetched payloads by normalized location - repeat
+        # requests within the TTL window answer from here instead of
+        # hitting wttr.in again (weather barely moves in ten minutes)
+        self.cache_ttl = cache_ttl
+        self._cache = {}
+        # One Session for the collector's lifetime: keep-alive reuses
+        # the TCP+TLS connection across cities instead of paying a
+        # handshake per request, and the pool is sized so fetch_all's
+        # worker threads share it without blocking on a free connection
+        self._session = requests.Session()
+        self._session.headers['User-Agent'] = 'weather-dashboard/1.0'
+        # Retry transient gateway errors with backoff instead of
+        # failing the city and refetching it on the next run
+        retry = requests.adapters.Retry(
+            total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=16, pool_maxsize=16, max_retries=retry)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
         self._init_database()
-    
+
     def _init_database(self):
-        """Create weather data table with country and coordinates"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS weather_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                city TEXT NOT NULL,
-                country TEXT NOT NULL,
-                latitude REAL,
-                longitude REAL,
-                date TEXT NOT NULL,
-                temp_c REAL,
-                feels_like_c REAL,
-                condition TEXT,
-                humidity INTEGER,
-                wind_speed_kmph REAL,
-                pressure_mb REAL,
-                visibility_km REAL,
-                uv_index INTEGER,
-                timestamp TEXT NOT NULL,
-                UNIQUE(city, country, date, timestamp)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """Create weather data tables with country and coordinates"""
+        init_weather_schema(self.db_name)
         print("✓ Database initialized")
+
+    def _get_connection(self):
+        """
+        Lazily open one connection and keep it for the collector's
+        lifetime instead of reopening the file (and its WAL/SHM state)
+        on every save and query
+        """
+        if self._conn is None:
+            # A larger statement cache keeps every query this class
+            # runs prepared across calls (the default is 128)
+            self._conn = sqlite3.connect(self.db_name, check_same_thread=False,
+                                         cached_statements=256)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute("PRAGMA temp_store=MEMORY")
+            self._conn.execute("PRAGMA cache_size=-20000")
+        return self._conn
+
+    def close(self):
+        """Close the held connection (safe to call more than once)"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
     
     def fetch_weather(self, city, country=None, lat=None, lon=None):
         """
@@ -72,14 +220,33 @@ class WeatherCollector:
             location = city
             print(f"⚠️  Using city only (might be ambiguous): {location}")
         
-        url = f"{self.base_url}/{location}?format=j1"
-        
+        # Normalized cache key: coordinates when given (rounded so
+        # near-identical points share an entry), else city+country
+        if lat is not None and lon is not None:
+            cache_key = (round(float(lat), 4), round(float(lon), 4))
+        else:
+            cache_key = (city.lower(), (country or '').lower())
+
+        cached_at, cached = self._cache.get(cache_key, (0, None))
+        if cached is not None and time.time() - cached_at < self.cache_ttl:
+            print(f"✓ Using cached data for {location} "
+                  f"({int(time.time() - cached_at)}s old)")
+            # Deep copy so callers can't mutate the cached payload
+            return copy.deepcopy(cached)
+
+        # Pre-encode the path once so urllib3 doesn't have to fix up
+        # spaces or accents in city names downstream
+        url = f"{self.base_url}/{quote(location, safe=',')}?format=j1"
+
         try:
             print(f"Fetching weather data from API...")
-            response = requests.get(url, timeout=10)
+            response = self._session.get(url, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
+                if orjson is not None:
+                    data = orjson.loads(response.content)
+                else:
+                    data = response.json()
                 
                 # Extract and verify what location was actually returned
                 nearest = data.get('nearest_area', [{}])[0]
@@ -103,7 +270,9 @@ class WeatherCollector:
                     'latitude': returned_lat,
                     'longitude': returned_lon
                 }
-                
+
+                self._cache[cache_key] = (time.time(), copy.deepcopy(data))
+
                 return data
             else:
                 print(f"❌ Error: Status code {response.status_code}")
@@ -119,80 +288,191 @@ class WeatherCollector:
             print(f"❌ Error: {e}")
             return None
     
-    def parse_weather_data(self, data, requested_city, requested_country=None):
+    # The save-path SQL, hoisted to constants so every call passes the
+    # byte-identical string and reuses the connection's prepared
+    # statement instead of re-parsing 14-parameter SQL each time
+    # The conflict target names the UNIQUE key, so only a true
+    # duplicate skips quietly - anything else (like a CHECK range
+    # failure on a fresh database) still raises and reaches the
+    # error handler instead of vanishing as OR IGNORE would have it
+    _INSERT_DEDUP_SQL = '''
+        INSERT INTO weather_data
+        (city, country, latitude, longitude, date, temp_c, feels_like_c,
+         condition, humidity, wind_speed_kmph, pressure_mb,
+         visibility_km, uv_index, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(city, country, date, timestamp) DO NOTHING
+    '''
+
+    _LATEST_UPSERT_SQL = '''
+        INSERT INTO weather_latest
+        (city, country, latitude, longitude, date, temp_c,
+         feels_like_c, condition, humidity, wind_speed_kmph,
+         pressure_mb, visibility_km, uv_index, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(city, country) DO UPDATE SET
+            latitude=excluded.latitude,
+            longitude=excluded.longitude,
+            date=excluded.date,
+            temp_c=excluded.temp_c,
+            feels_like_c=excluded.feels_like_c,
+            condition=excluded.condition,
+            humidity=excluded.humidity,
+            wind_speed_kmph=excluded.wind_speed_kmph,
+            pressure_mb=excluded.pressure_mb,
+            visibility_km=excluded.visibility_km,
+            uv_index=excluded.uv_index,
+            timestamp=excluded.timestamp
+    '''
+
+    _STATS_REFRESH_SQL = '''
+        INSERT OR REPLACE INTO city_stats
+        SELECT city, country, AVG(temp_c), MIN(temp_c), MAX(temp_c),
+               AVG(temp_c * temp_c), AVG(humidity),
+               AVG(wind_speed_kmph), COUNT(*)
+        FROM weather_data
+        WHERE city = ? AND country = ?
+        GROUP BY city, country
+    '''
+
+    # Record keys in the column order the statements above expect
+    _FIELDS = ('city', 'country', 'latitude', 'longitude', 'date',
+               'temp_c', 'feels_like_c', 'condition', 'humidity',
+               'wind_speed_kmph', 'pressure_mb', 'visibility_km',
+               'uv_index', 'timestamp')
+
+    # Our field name, the API's key for it, and the cast to apply -
+    # parse_weather_data walks this table, so adding a measurement is
+    # a one-line change instead of another chained indexing expression
+    _SCHEMA = (
+        ('temp_c', 'temp_C', float),
+        ('feels_like_c', 'FeelsLikeC', float),
+        ('humidity', 'humidity', int),
+        ('wind_speed_kmph', 'windspeedKmph', float),
+        ('pressure_mb', 'pressure', float),
+        ('visibility_km', 'visibility', float),
+        ('uv_index', 'uvIndex', int),
+    )
+
+    def parse_weather_data(self, data, requested_city, requested_country=None,
+                           date_s=None, ts_s=None):
         """
         Extract relevant information from API response
         Uses verified location from API response
+
+        date_s/ts_s let a batch caller format the capture time once and
+        share it across every record instead of reading and formatting
+        the clock per city
         """
         try:
             current = data['current_condition'][0]
             verified = data.get('_verified_location', {})
-            
+
+            if ts_s is None:
+                # One clock read so date and timestamp can't straddle
+                # midnight
+                now = datetime.now()
+                date_s = now.strftime('%Y-%m-%d')
+                ts_s = now.strftime('%Y-%m-%d %H:%M:%S')
+
             weather_record = {
                 'city': verified.get('city', requested_city),
                 'country': verified.get('country', requested_country or 'Unknown'),
                 'latitude': verified.get('latitude'),
                 'longitude': verified.get('longitude'),
-                'date': datetime.now().strftime('%Y-%m-%d'),
-                'temp_c': float(current['temp_C']),
-                'feels_like_c': float(current['FeelsLikeC']),
+                'date': date_s,
                 'condition': current['weatherDesc'][0]['value'],
-                'humidity': int(current['humidity']),
-                'wind_speed_kmph': float(current['windspeedKmph']),
-                'pressure_mb': float(current['pressure']),
-                'visibility_km': float(current['visibility']),
-                'uv_index': int(current['uvIndex']),
-                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                'timestamp': ts_s
             }
-            
+
+            for field, source, cast in self._SCHEMA:
+                weather_record[field] = cast(current[source])
+
             return weather_record
-            
+
         except Exception as e:
             print(f"❌ Error parsing data: {e}")
             return None
     
     def save_weather_data(self, weather_record):
         """Save weather data to database with location verification"""
-        conn = sqlite3.connect(self.db_name)
+        conn = self._get_connection()
         cursor = conn.cursor()
-        
+        row = tuple(weather_record[f] for f in self._FIELDS)
+
         try:
-            cursor.execute('''
-                INSERT INTO weather_data 
-                (city, country, latitude, longitude, date, temp_c, feels_like_c, 
-                 condition, humidity, wind_speed_kmph, pressure_mb, 
-                 visibility_km, uv_index, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                weather_record['city'],
-                weather_record['country'],
-                weather_record['latitude'],
-                weather_record['longitude'],
-                weather_record['date'],
-                weather_record['temp_c'],
-                weather_record['feels_like_c'],
-                weather_record['condition'],
-                weather_record['humidity'],
-                weather_record['wind_speed_kmph'],
-                weather_record['pressure_mb'],
-                weather_record['visibility_km'],
-                weather_record['uv_index'],
-                weather_record['timestamp']
-            ))
-            
+            # SQLite skips a duplicate row itself via the conflict
+            # clause - rowcount says whether anything landed, with no
+            # exception raised and unwound for what is an expected
+            # outcome
+            cursor.execute(self._INSERT_DEDUP_SQL, row)
+
+            if cursor.rowcount == 0:
+                print(f"⚠️  Data already exists for {weather_record['city']}, {weather_record['country']} at this time")
+                return False
+
+            # Keep the latest-per-city snapshot in step with the history
+            cursor.execute(self._LATEST_UPSERT_SQL, row)
+
+            # Refresh this city's materialized aggregates - one indexed
+            # pass over just its own rows
+            cursor.execute(self._STATS_REFRESH_SQL,
+                           (weather_record['city'], weather_record['country']))
+
             conn.commit()
             print(f"✓ Weather data saved: {weather_record['city']}, {weather_record['country']}")
             return True
-            
-        except sqlite3.IntegrityError:
-            print(f"⚠️  Data already exists for {weather_record['city']}, {weather_record['country']} at this time")
-            return False
+
         except Exception as e:
+            conn.rollback()
             print(f"❌ Error saving data: {e}")
             return False
-        finally:
-            conn.close()
     
+    def save_weather_batch(self, weather_records):
+        """
+        Save many records in one transaction - one commit (and one
+        fsync) for the whole batch instead of one per record
+        Returns: number of history rows actually inserted
+        """
+        if not weather_records:
+            return 0
+
+        rows = [tuple(record[f] for f in self._FIELDS)
+                for record in weather_records]
+
+        conn = self._get_connection()
+        cursor = conn.cursor()
+
+        # Rows per commit: one transaction covers a normal batch, but a
+        # very large load commits in bounded slices so the WAL and page
+        # cache stay a sane size (re-running after a failure is safe -
+        # the conflict clause makes the insert idempotent)
+        chunk = 50000
+
+        try:
+            before = conn.total_changes
+            for i in range(0, len(rows), chunk):
+                cursor.executemany(self._INSERT_DEDUP_SQL, rows[i:i + chunk])
+                if i + chunk < len(rows):
+                    conn.commit()
+            inserted = conn.total_changes - before
+
+            cursor.executemany(self._LATEST_UPSERT_SQL, rows)
+
+            # Refresh the materialized aggregates once per distinct city
+            cursor.executemany(
+                self._STATS_REFRESH_SQL,
+                sorted({(r['city'], r['country']) for r in weather_records}))
+
+            conn.commit()
+            print(f"✓ Batch saved: {inserted} of {len(rows)} records inserted")
+            return inserted
+
+        except Exception as e:
+            conn.rollback()
+            print(f"❌ Error saving batch: {e}")
+            return 0
+
     def collect_and_store(self, city, country=None, lat=None, lon=None):
         """
         Complete pipeline: fetch, parse, and store weather data
@@ -239,46 +519,99 @@ class WeatherCollector:
         
         return success
     
+    def collect_many(self, cities):
+        """
+        Fetch and parse a whole list of cities, then save everything
+        through save_weather_batch - one commit amortized over the
+        batch instead of one per city
+
+        cities: list of dicts with 'city' and optional 'country'/'lat'/'lon'
+        Returns: number of records inserted
+        """
+        records = []
+
+        # One capture time for the whole batch - it lands in a single
+        # transaction anyway, and the parse loop skips a clock read and
+        # two strftime calls per city
+        now = datetime.now()
+        date_s = now.strftime('%Y-%m-%d')
+        ts_s = now.strftime('%Y-%m-%d %H:%M:%S')
+
+        for location, data in self.fetch_all(cities):
+            if not data:
+                continue
+
+            record = self.parse_weather_data(
+                data, location['city'], location.get('country'),
+                date_s=date_s, ts_s=ts_s)
+            if record:
+                records.append(record)
+
+        return self.save_weather_batch(records)
+
+    def fetch_all(self, cities, max_workers=4):
+        """
+        Fetch several cities concurrently. The fetches are pure network
+        wait, so a small thread pool makes the wall time the slowest
+        response instead of the sum of them, while the pool size keeps
+        the burst polite to the API
+        Returns: list of (location, data or None) pairs, in input order
+        """
+        def fetch_one(location):
+            return location, self.fetch_weather(
+                location['city'],
+                location.get('country'),
+                location.get('lat'),
+                location.get('lon')
+            )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(fetch_one, cities))
+
+    def iter_weather_data(self, limit=None):
+        """
+        Yield stored weather rows newest-first, lazily - the cursor
+        streams rows as they're consumed instead of materializing the
+        whole table, and a limit becomes a SQL LIMIT so the walk down
+        the timestamp index stops after that many rows
+        """
+        conn = self._get_connection()
+
+        if limit is not None:
+            cursor = conn.execute("""
+                SELECT city, country, date, temp_c, condition, timestamp
+                FROM weather_data
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """, (limit,))
+        else:
+            cursor = conn.execute("""
+                SELECT city, country, date, temp_c, condition, timestamp
+                FROM weather_data
+                ORDER BY timestamp DESC
+            """)
+
+        for row in cursor:
+            yield row
+
     def get_all_weather_data(self):
         """Retrieve all stored weather data"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT city, country, date, temp_c, condition, timestamp 
-            FROM weather_data 
-            ORDER BY timestamp DESC
-        """)
-        rows = cursor.fetchall()
-        
-        conn.close()
-        return rows
-    
+        return list(self.iter_weather_data())
+
     def get_weather_count(self):
         """Get total number of weather records"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM weather_data")
-        count = cursor.fetchone()[0]
-        
-        conn.close()
-        return count
-    
+        cursor = self._get_connection().execute(
+            "SELECT COUNT(*) FROM weather_data")
+        return cursor.fetchone()[0]
+
     def get_cities_tracked(self):
         """Get list of unique cities being tracked"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT DISTINCT city, country 
-            FROM weather_data 
+        cursor = self._get_connection().execute("""
+            SELECT DISTINCT city, country
+            FROM weather_data
             ORDER BY city
         """)
-        cities = cursor.fetchall()
-        
-        conn.close()
-        return cities
+        return cursor.fetchall()
 
 
 # ===== TEST SCENARIOS =====
@@ -327,7 +660,7 @@ def test_location_handling():
     
     print("\nRecent weather data:")
     print("-" * 70)
-    for row in collector.get_all_weather_data()[:10]:
+    for row in collector.iter_weather_data(limit=10):
         city, country, date, temp, condition, timestamp = row
         print(f"  {city}, {country} on {date}: {temp}°C - {condition}")
 
@@ -350,10 +683,10 @@ def collect_multiple_cities():
         {'city': 'Madrid', 'country': 'Spain'},
     ]
     
-    for location in cities:
-        collector.collect_and_store(location['city'], country=location['country'])
-        time.sleep(2)  # Be respectful to the API
-    
+    # Fetch everything, then save the whole batch under one commit
+    inserted = collector.collect_many(cities)
+    print(f"\n✓ {inserted} new records collected")
+
     # Summary
     print("\n" + "=" * 70)
     print("COLLECTION COMPLETE")
@@ -398,7 +731,7 @@ if __name__ == "__main__":
         
         # Show what was collected
         print("\nAll collected data:")
-        for row in collector.get_all_weather_data()[:5]:
+        for row in collector.iter_weather_data(limit=5):
             city, country, date, temp, condition, timestamp = row
             print(f"  {city}, {country}: {temp}°C - {condition}")
     else: